@@ -1,8 +1,10 @@
 """
 Configuration for the content conversion system
 """
+import functools
 import os
 import pathlib
+import re
 from datetime import datetime
 from typing import List
 
@@ -22,6 +24,7 @@ REQUIRED_COLLECTIONS = (
 )
 
 
+@functools.lru_cache(maxsize=8192)
 def format_date_to_iso(date_string: str) -> str:
     """
     Formats a date string to YYYY-MM-DD format
@@ -61,18 +64,18 @@ converter_configs: List[ContentConverterConfig] = [
 exporter_configs: List[LatestItemsExporterConfig] = []
 
 
+# Characters that are not alphanumeric, whitespace or hyphens (\w also matches "_")
+_SLUG_STRIP = re.compile(r"[^\w\s-]|_")
+# Runs of whitespace and hyphens collapse into a single hyphen
+_SLUG_COLLAPSE = re.compile(r"[-\s]+")
+
+
+@functools.lru_cache(maxsize=4096)
 def create_slug(text: str) -> str:
     """
     Creates a URL-friendly slug from a string
     """
-    # Convert to lowercase
-    slug = text.lower()
-    # Remove special characters
-    slug = "".join(c for c in slug if c.isalnum() or c.isspace() or c == "-")
-    # Replace spaces with hyphens
-    slug = slug.replace(" ", "-")
-    # Replace multiple hyphens with single hyphen
-    while "--" in slug:
-        slug = slug.replace("--", "-")
+    # Remove special characters, then replace spaces/hyphen runs with one hyphen
+    slug = _SLUG_COLLAPSE.sub("-", _SLUG_STRIP.sub("", text.lower()))
     # Trim leading/trailing hyphens
     return slug.strip("-")
@@ -1,84 +1,232 @@
 """
 Content conversion script for Kantan CMS
 """
-import json
+import hashlib
+import heapq
 import os
 import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Set, TypeVar, cast
+from typing import Any, Deque, Dict, Iterator, List, Set, Tuple, TypeVar, cast
 
+import orjson
+
+try:
+    import ijson
+except ImportError:  # ijson is optional, fall back to loading the whole file
+    ijson = None
+
+import scripts.config
 from scripts.config import converter_configs, exporter_configs, create_slug
 from scripts.types import (
+    CompiledConverterConfig,
+    CompiledFrontmatterField,
     ContentConverterConfig,
     ContentItem,
     ExportedItem,
+    FrontmatterFieldConfig,
     LatestItemsExporterConfig,
 )
 
 T = TypeVar("T")
 
+# Maximum number of rendered files waiting to be written at any time
+MAX_PENDING_WRITES = 256
+
+# Buffer size for files assembled from many small chunks
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Modules that determine the converted output besides the source data
+CONVERTER_SOURCE_FILES = (__file__, scripts.config.__file__)
+
+# Type hints used for exported fields, keyed by the exact value type
+TYPE_HINTS: Dict[type, str] = {
+    str: "str",
+    int: "int",
+    float: "float",
+    bool: "bool",
+    list: "list",
+    dict: "dict",
+}
+
+# Digests of the converted files as last written, keyed by target path
+DIGEST_CACHE_PATH = os.path.join(".cache", "convert_digests.json")
+
 
 def ensure_directory_exists(dir_path: str) -> None:
     """
     Ensures that the specified directory exists, creating it if necessary
     """
-    if not os.path.exists(dir_path):
-        os.makedirs(dir_path, exist_ok=True)
+    Path(dir_path).mkdir(parents=True, exist_ok=True)
 
 
 def read_json_file(file_path: str) -> List[Any]:
     """
     Reads and parses a JSON file
     """
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(file_path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def iter_json_items(file_path: str) -> Iterator[Any]:
+    """
+    Yields the items of a JSON array file one at a time
+
+    Uses ijson to stream the file when available so only one record is held
+    in memory at once, falling back to loading the whole file otherwise.
+    """
+    if ijson is None:
+        yield from read_json_file(file_path)
+        return
+
+    with open(file_path, "rb") as f:
+        yield from ijson.items(f, "item", use_float=True)
+
+
+def compile_frontmatter_fields(
+    fields: List[FrontmatterFieldConfig],
+) -> Tuple[CompiledFrontmatterField, ...]:
+    """
+    Resolves frontmatter field configurations into plain tuples so the
+    per-item loops don't repeat the same dictionary lookups
+    """
+    return tuple(
+        (
+            field["sourceField"],
+            field["targetField"],
+            field.get("formatter"),
+            bool(field.get("required", False)),
+        )
+        for field in fields
+    )
 
 
-def generate_frontmatter(item: ContentItem, config: List[Dict[str, Any]]) -> str:
+def compile_converter_config(
+    config: ContentConverterConfig,
+) -> CompiledConverterConfig:
+    """
+    Resolves a content converter configuration for the per-item conversion
+    """
+    return CompiledConverterConfig(
+        target_dir=config["targetDir"],
+        slug_field=config["slugField"],
+        content_field=config["contentField"],
+        output_format=config["outputFormat"],
+        frontmatter_fields=compile_frontmatter_fields(config["frontmatterFields"]),
+        extractors=tuple(config["extractors"]),
+    )
+
+
+def generate_frontmatter(
+    item: ContentItem, fields: Tuple[CompiledFrontmatterField, ...]
+) -> bytes:
     """
-    Generates frontmatter for a markdown file based on configuration
+    Generates UTF-8 encoded frontmatter for a markdown file based on configuration
     """
-    frontmatter_lines = ["---"]
-
-    for field in config:
-        source_field = field["sourceField"]
-        target_field = field["targetField"]
-        formatter = field.get("formatter")
-        required = field.get("required", False)
-
-        if (
-            source_field in item
-            and item[source_field] is not None
-            and item[source_field] != ""
-        ):
-            value = item[source_field]
+    frontmatter_parts = [b"---\n"]
+    append = frontmatter_parts.append
+
+    for source_field, target_field, formatter, required in fields:
+        value = item.get(source_field)
+
+        if value is not None and value != "":
             formatted_value = formatter(value) if formatter else value
 
             # Add quotes for string values
             if isinstance(formatted_value, str):
-                formatted_value = f'"{formatted_value}"'
-
-            frontmatter_lines.append(f"{target_field}: {formatted_value}")
+                append(f'{target_field}: "{formatted_value}"\n'.encode())
+            else:
+                append(f"{target_field}: {formatted_value}\n".encode())
         elif required:
-            frontmatter_lines.append(f'{target_field}: ""')
+            append(f'{target_field}: ""\n'.encode())
+
+    append(b"---\n")
+    return b"".join(frontmatter_parts)
+
+
+def write_output(file_path: str, chunks: List[bytes]) -> str:
+    """
+    Writes byte chunks to a file with raw system calls, bypassing text I/O
+
+    On POSIX the chunks are written with a single scatter-gather os.writev
+    call so they are never concatenated in memory.
+    """
+    fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        if hasattr(os, "writev"):
+            buffers = [memoryview(chunk) for chunk in chunks if chunk]
+            while buffers:
+                written = os.writev(fd, buffers)
+                # Drop what was written in case of a partial write
+                while buffers and written >= len(buffers[0]):
+                    written -= len(buffers.pop(0))
+                if buffers:
+                    buffers[0] = buffers[0][written:]
+        else:
+            view = memoryview(b"".join(chunks))
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+    finally:
+        os.close(fd)
+
+    return file_path
+
+
+def load_digests() -> Dict[str, str]:
+    """
+    Loads the digests of previously converted files
+    """
+    try:
+        with open(DIGEST_CACHE_PATH, "rb") as f:
+            return orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
 
-    frontmatter_lines.append("---")
-    frontmatter_lines.append("")
-    return "\n".join(frontmatter_lines)
 
+def save_digests(digests: Dict[str, str]) -> None:
+    """
+    Saves the digests of converted files for the next run
+    """
+    ensure_directory_exists(os.path.dirname(DIGEST_CACHE_PATH))
+    with open(DIGEST_CACHE_PATH, "wb") as f:
+        f.write(orjson.dumps(digests))
 
-def process_content_item(
+
+def digest_chunks(chunks: List[bytes]) -> str:
+    """
+    Computes a short BLAKE2b digest of file contents given as byte chunks
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_up_to_date(target_path: str, source_mtime: float) -> bool:
+    """
+    Checks whether a converted file was written after its inputs last changed
+    """
+    try:
+        return os.path.getmtime(target_path) >= source_mtime
+    except OSError:
+        return False
+
+
+def build_output(
     item: ContentItem,
-    target_dir: str,
-    config: ContentConverterConfig,
+    config: CompiledConverterConfig,
     processed_slugs: Set[str],
-) -> None:
+) -> Tuple[str, List[bytes]]:
     """
-    Processes a single content item and converts it to the target format
+    Converts a single content item to the target format
+
+    Returns the target path and the encoded file contents without writing them.
     """
     # Create a slug from the specified field
-    slug_field = config["slugField"]
-    slug = create_slug(str(item.get(slug_field, "")))
+    slug = create_slug(str(item.get(config.slug_field, "")))
 
     # Handle duplicate slugs by adding a unique identifier
     if slug in processed_slugs:
@@ -89,32 +237,31 @@ def process_content_item(
     processed_slugs.add(slug)
 
     # Apply extractors to enrich the item with additional data
-    for extractor_config in config["extractors"]:
+    for extractor_config in config.extractors:
         condition = extractor_config["condition"]
         if condition(item):
             field = extractor_config["field"]
             extractor = extractor_config["extractor"]
             item[field] = extractor(item)
 
-    content_field = config["contentField"]
-    output_format = config["outputFormat"]
+    content_field = config.content_field
 
-    if output_format == "markdown":
+    if config.output_format == "markdown":
         # Generate frontmatter
-        frontmatter = generate_frontmatter(item, config["frontmatterFields"])
-
-        # Combine frontmatter and content
-        file_content = f"{frontmatter}\n{item.get(content_field, '')}"
+        frontmatter = generate_frontmatter(item, config.frontmatter_fields)
+
+        # Frontmatter and content are written back to back
+        file_chunks = [
+            frontmatter,
+            b"\n",
+            str(item.get(content_field, "")).encode("utf-8"),
+        ]
         file_extension = "md"
     else:
         # For JSON output, create a JSON representation
         output_object: Dict[str, Any] = {}
 
-        for field in config["frontmatterFields"]:
-            source_field = field["sourceField"]
-            target_field = field["targetField"]
-            formatter = field.get("formatter")
-
+        for source_field, target_field, formatter, _ in config.frontmatter_fields:
             if source_field in item:
                 value = item[source_field]
                 output_object[target_field] = formatter(value) if formatter else value
@@ -122,19 +269,15 @@ def process_content_item(
         # Add the content field
         output_object["content"] = item.get(content_field, "")
 
-        file_content = json.dumps(output_object, indent=2)
+        file_chunks = [orjson.dumps(output_object, option=orjson.OPT_INDENT_2)]
         file_extension = "json"
 
-    target_path = os.path.join(target_dir, f"{slug}.{file_extension}")
+    target_path = os.path.join(config.target_dir, f"{slug}.{file_extension}")
 
-    # Write to the target file
-    with open(target_path, "w", encoding="utf-8") as f:
-        f.write(file_content)
+    return target_path, file_chunks
 
-    print(f"Converted: {target_path}")
 
-
-async def convert_content(config: ContentConverterConfig) -> None:
+def convert_content(config: ContentConverterConfig) -> None:
     """
     Converts content items from JSON to the target format based on configuration
     """
@@ -144,19 +287,65 @@ async def convert_content(config: ContentConverterConfig) -> None:
 
         # Read the source JSON file
         source_path = os.path.abspath(config["sourceFile"])
-        items = read_json_file(source_path)
 
-        print(f"Found {len(items)} items to convert for {config['collectionName']}")
+        # Resolve the configuration once rather than for every item
+        compiled_config = compile_converter_config(config)
+
+        # Files written after both the source data and the converter code last
+        # changed are skipped
+        source_mtime = max(
+            os.path.getmtime(path) for path in (source_path, *CONVERTER_SOURCE_FILES)
+        )
+        up_to_date_count = 0
+
+        # Files whose rendered contents match what was last written are skipped too
+        digests = load_digests()
 
         # Keep track of processed slugs to handle duplicates
         processed_slugs: Set[str] = set()
 
-        # Process each item
-        for item in items:
-            process_content_item(
-                cast(ContentItem, item), config["targetDir"], config, processed_slugs
-            )
+        # Items are rendered sequentially since slug deduplication depends on
+        # order, while the file writes are handed off to a thread pool
+        pending_writes: Deque[Tuple["Future[str]", str]] = deque()
+
+        def finish_write() -> None:
+            future, digest = pending_writes.popleft()
+            target_path = future.result()
+            digests[target_path] = digest
+            print(f"Converted: {target_path}")
+
+        rendered_outputs = (
+            build_output(cast(ContentItem, item), compiled_config, processed_slugs)
+            for item in iter_json_items(source_path)
+        )
+
+        with ThreadPoolExecutor() as executor:
+            for target_path, file_chunks in rendered_outputs:
+                if is_up_to_date(target_path, source_mtime):
+                    up_to_date_count += 1
+                    continue
+
+                digest = digest_chunks(file_chunks)
+                if digests.get(target_path) == digest and os.path.exists(target_path):
+                    up_to_date_count += 1
+                    continue
+
+                pending_writes.append(
+                    (executor.submit(write_output, target_path, file_chunks), digest)
+                )
+
+                if len(pending_writes) >= MAX_PENDING_WRITES:
+                    finish_write()
+
+            while pending_writes:
+                finish_write()
 
+        save_digests(digests)
+
+        print(
+            f"Converted {len(processed_slugs) - up_to_date_count} items for "
+            f"{config['collectionName']} ({up_to_date_count} already up to date)"
+        )
         print(
             f"Content conversion completed successfully for {config['collectionName']}"
         )
@@ -164,7 +353,7 @@ async def convert_content(config: ContentConverterConfig) -> None:
         print(f"Error converting content for {config['collectionName']}:", error)
 
 
-async def export_latest_items(config: LatestItemsExporterConfig) -> None:
+def export_latest_items(config: LatestItemsExporterConfig) -> None:
     """
     Exports the latest items to a Python file based on configuration
     """
@@ -183,13 +372,14 @@ async def export_latest_items(config: LatestItemsExporterConfig) -> None:
         sort_field = config["sortField"]
         sort_direction = config["sortDirection"]
 
-        def sort_key(item: Dict[str, Any]) -> str:
-            return str(item.get(sort_field, ""))
-
-        sorted_items = sorted(items, key=sort_key, reverse=(sort_direction == "desc"))
+        def sort_key(item: Dict[str, Any], _sort_field: str = sort_field) -> str:
+            return str(item.get(_sort_field, ""))
 
-        # Take the latest N items
-        latest_items = sorted_items[: config["itemCount"]]
+        # Take the latest N items without sorting the whole collection
+        if sort_direction == "desc":
+            latest_items = heapq.nlargest(config["itemCount"], items, key=sort_key)
+        else:
+            latest_items = heapq.nsmallest(config["itemCount"], items, key=sort_key)
 
         # Format the items based on configuration
         formatted_items: List[ExportedItem] = []
@@ -203,42 +393,33 @@ async def export_latest_items(config: LatestItemsExporterConfig) -> None:
 
             formatted_items.append(cast(ExportedItem, formatted_item))
 
-        # Create the Python file content
-        py_content = f"""# Auto-generated from {config['sourceFile']}
+        # Create the Python file content as encoded chunks
+        py_chunks = [
+            f"""# Auto-generated from {config['sourceFile']}
 # Last updated: {datetime.now().isoformat()}
 
 from typing import List, TypedDict
 
 class {config['interfaceName']}(TypedDict):
-"""
+""".encode()
+        ]
 
         # Add type hints for each field
         if formatted_items:
             first_item = formatted_items[0]
             for key, value in first_item.items():
-                type_name = type(value).__name__
-                if type_name == "str":
-                    type_hint = "str"
-                elif type_name == "int":
-                    type_hint = "int"
-                elif type_name == "float":
-                    type_hint = "float"
-                elif type_name == "bool":
-                    type_hint = "bool"
-                elif type_name == "list":
-                    type_hint = "list"
-                elif type_name == "dict":
-                    type_hint = "dict"
-                else:
-                    type_hint = "Any"
-
-                py_content += f"    {key}: {type_hint}\n"
-
-        py_content += f"\n\n{config['exportName']}: List[{config['interfaceName']}] = {json.dumps(formatted_items, indent=2)}\n"
+                type_hint = TYPE_HINTS.get(type(value), "Any")
+                py_chunks.append(f"    {key}: {type_hint}\n".encode())
+
+        py_chunks.append(
+            f"\n\n{config['exportName']}: List[{config['interfaceName']}] = ".encode()
+        )
+        py_chunks.append(orjson.dumps(formatted_items, option=orjson.OPT_INDENT_2))
+        py_chunks.append(b"\n")
 
         # Write to the target file
-        with open(config["targetFile"], "w", encoding="utf-8") as f:
-            f.write(py_content)
+        with open(config["targetFile"], "wb", buffering=WRITE_BUFFER_SIZE) as f:
+            f.writelines(py_chunks)
 
         print(f"Exported latest items to: {config['targetFile']}")
 
@@ -246,18 +427,18 @@ class {config['interfaceName']}(TypedDict):
         print("Error exporting latest items:", error)
 
 
-async def main() -> None:
+def main() -> None:
     """
     Execute the conversion and extraction
     """
     try:
         # Process all converter configurations
         for config in converter_configs:
-            await convert_content(config)
+            convert_content(config)
 
         # Process all exporter configurations
         for config in exporter_configs:
-            await export_latest_items(config)
+            export_latest_items(config)
 
         print("All conversions completed successfully")
     except Exception as error:
@@ -265,7 +446,4 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-    import asyncio
-    from datetime import datetime
-
-    asyncio.run(main())
+    main()
@@ -1,13 +1,27 @@
 """
 Script to fetch data from Kantan CMS API
 """
-import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from pathlib import Path
-from typing import Any, Dict, List, Optional, TypedDict, cast
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TypedDict,
+    cast,
+)
 
+import orjson
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 # Load environment variables from .env.local file
 load_dotenv(dotenv_path=".env.local")
@@ -76,6 +90,22 @@ class ApiValidationResponse(TypedDict):
     status: int
 
 
+# A fetched page of a paginated listing
+class Page(TypedDict):
+    data: Optional[Dict[str, Any]]  # None when the server answered 304 Not Modified
+    etag: Optional[str]
+
+
+# ETags of the record pages last saved for a collection
+class CachedRecords(TypedDict):
+    page_size: int
+    count: int
+    etags: List[Optional[str]]
+
+
+# Number of pages requested concurrently
+FETCH_CONCURRENCY = 16
+
 # Create a session with authentication headers
 session = requests.Session()
 session.headers.update(
@@ -86,6 +116,81 @@ session.headers.update(
     }
 )
 
+# Keep one pooled keep-alive connection per concurrent request so page fetches
+# reuse connections instead of opening (and TLS handshaking) new ones
+adapter = HTTPAdapter(pool_maxsize=FETCH_CONCURRENCY)
+session.mount("https://", adapter)
+session.mount("http://", adapter)
+
+# Buffer size for the records file, which is written one record at a time
+WRITE_BUFFER_SIZE = 1 << 20
+
+# ETags of previously fetched record pages, used for conditional requests
+ETAG_CACHE_PATH = Path(".cache") / "etags.json"
+
+
+def load_etag_cache() -> Dict[str, CachedRecords]:
+    """
+    Loads the cached record page ETags, keyed by collection ID
+    """
+    try:
+        return orjson.loads(ETAG_CACHE_PATH.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+
+
+def save_etag_cache(etag_cache: Dict[str, CachedRecords]) -> None:
+    """
+    Saves the record page ETags for the next run
+    """
+    try:
+        ETAG_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        ETAG_CACHE_PATH.write_bytes(orjson.dumps(etag_cache))
+    except OSError as error:
+        print("Error saving ETag cache:", error)
+
+
+def fetch_page(url: str, etag: Optional[str] = None) -> Page:
+    """
+    Fetches a single page from the API, conditionally if an ETag is given
+    """
+    response = session.get(url, headers={"If-None-Match": etag} if etag else None)
+    if response.status_code == 304:
+        return {"data": None, "etag": etag}
+
+    response.raise_for_status()
+    return {"data": response.json(), "etag": response.headers.get("ETag")}
+
+
+def fetch_all_pages(
+    page_url: Callable[[int], str],
+    count_items: Callable[[], int],
+    page_size: int,
+    etags: Sequence[Optional[str]] = (),
+) -> Iterator[Page]:
+    """
+    Fetches every page of a paginated listing, yielding the pages in order
+
+    The first page is requested alongside the item count so the count lookup
+    doesn't add a round trip, then the remaining pages are fetched concurrently.
+    Pages with a known ETag are requested conditionally.
+    """
+
+    def fetch(page: int) -> Page:
+        etag = etags[page - 1] if page <= len(etags) else None
+        return fetch_page(page_url(page), etag)
+
+    with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY) as executor:
+        count_future = executor.submit(count_items)
+        first_page_future = executor.submit(fetch, 1)
+
+        pages = (count_future.result() + page_size - 1) // page_size  # Ceiling division
+        if pages == 0:
+            return
+
+        yield first_page_future.result()
+        yield from executor.map(fetch, range(2, pages + 1))
+
 
 def validate_api_key() -> bool:
     """
@@ -144,20 +249,15 @@ def get_collections() -> List[Collection]:
     Retrieves all collections with pagination
     """
     try:
-        count = count_collections()
         page_size = 100
-        pages = (count + page_size - 1) // page_size  # Ceiling division
 
-        all_collections: List[Collection] = []
+        def page_url(page: int) -> str:
+            return f"{config['base_url']}/collections/?page_size={page_size}&page_num={page}"
 
-        for page in range(1, pages + 1):
-            response = session.get(
-                f"{config['base_url']}/collections/?page_size={page_size}&page_num={page}"
-            )
-            response.raise_for_status()
-            data = response.json()
+        all_collections: List[Collection] = []
 
-            all_collections.extend(data["collections"])
+        for page in fetch_all_pages(page_url, count_collections, page_size):
+            all_collections.extend(cast(Dict[str, Any], page["data"])["collections"])
 
         # Filter collections if required
         if config["required_collections"]:
@@ -189,52 +289,133 @@ def count_records(collection_id: str) -> int:
         return 0
 
 
-def get_records(collection: Collection) -> List[Record]:
+def get_records_file_path(collection: Collection) -> Path:
     """
-    Retrieves all records from a collection with pagination
+    Returns the path of the JSON file holding a collection's records
     """
+    return Path(config["storage_path"]) / f"{collection['name']}.json"
+
+
+def get_records(
+    collection: Collection, etag_cache: Optional[Dict[str, CachedRecords]] = None
+) -> int:
+    """
+    Retrieves all records from a collection with pagination and saves them to
+    a file as they arrive, returning the number of records saved
+
+    Pages are requested with the ETags cached from the last run; when every
+    page comes back unchanged the existing file is left untouched.
+    """
+    if etag_cache is None:
+        etag_cache = {}
+
     try:
-        count = count_records(collection["id"])
         page_size = 100
-        pages = (count + page_size - 1) // page_size  # Ceiling division
+        file_path = get_records_file_path(collection)
 
-        all_records: List[Record] = []
+        def page_url(page: int) -> str:
+            return f"{config['base_url']}/collections/{collection['id']}/records/?page_size={page_size}&page_num={page}"
 
-        for page in range(1, pages + 1):
-            response = session.get(
-                f"{config['base_url']}/collections/{collection['id']}/records/?page_size={page_size}&page_num={page}"
-            )
-            response.raise_for_status()
-            data = response.json()
+        # Only send conditional requests if the file they refer to still exists
+        cached = etag_cache.get(collection["id"])
+        if cached and (cached["page_size"] != page_size or not file_path.exists()):
+            cached = None
+        cached_etags = cached["etags"] if cached else []
 
-            all_records.extend(data["records"])
+        pages = fetch_all_pages(
+            page_url, lambda: count_records(collection["id"]), page_size, cached_etags
+        )
 
-        # Save records to file
-        save_records_to_file(collection, all_records)
+        # Read ahead until the first modified page
+        fetched_pages: List[Page] = []
+        for page in pages:
+            fetched_pages.append(page)
+            if page["data"] is not None:
+                break
+        else:
+            if cached and len(fetched_pages) == len(cached_etags):
+                print(
+                    f"✓ Records for collection \"{collection['name']}\" are unchanged"
+                )
+                return cached["count"]
 
-        return all_records
+        page_etags: List[Optional[str]] = []
+
+        def iter_records() -> Iterator[Record]:
+            previous_records: Optional[List[Record]] = None
+
+            for page_num, page in enumerate(chain(fetched_pages, pages), start=1):
+                page_etags.append(page["etag"])
+
+                if page["data"] is not None:
+                    yield from page["data"]["records"]
+                    continue
+
+                # Unchanged pages are copied from the previously saved file
+                if previous_records is None:
+                    previous_records = orjson.loads(file_path.read_bytes())
+                start = (page_num - 1) * page_size
+                yield from previous_records[start : start + page_size]
+
+        # Save records to file
+        count = save_records_to_file(collection, iter_records())
+        if count is None:
+            etag_cache.pop(collection["id"], None)
+            return 0
+
+        etag_cache[collection["id"]] = {
+            "page_size": page_size,
+            "count": count,
+            "etags": page_etags,
+        }
+        return count
     except requests.RequestException as error:
         print(f"Error retrieving records for collection {collection['id']}:", error)
-        return []
+        return 0
 
 
-def save_records_to_file(collection: Collection, records: List[Record]) -> None:
+def save_records_to_file(
+    collection: Collection, records: Iterable[Record]
+) -> Optional[int]:
     """
-    Saves records to a JSON file
+    Streams records to a JSON file, returning the number of records written
+    or None if the file could not be saved
+
+    Records are written one at a time to a temporary file which replaces the
+    previous file once every record has been written.
     """
-    try:
-        # Ensure directory exists
-        storage_path = Path(config["storage_path"])
-        storage_path.mkdir(parents=True, exist_ok=True)
+    # Ensure directory exists
+    file_path = get_records_file_path(collection)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Write to file
-        file_path = storage_path / f"{collection['name']}.json"
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(records, f, indent=2)
+    temp_path = file_path.with_name(f"{file_path.name}.tmp")
+    count = 0
 
-        print(f"✓ Saved {len(records)} records for collection \"{collection['name']}\"")
-    except Exception as error:
+    try:
+        # Write to file as a JSON array indented by two spaces
+        with open(temp_path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(b"[")
+            for record in records:
+                f.write(b",\n  " if count else b"\n  ")
+                f.write(
+                    orjson.dumps(record, option=orjson.OPT_INDENT_2).replace(
+                        b"\n", b"\n  "
+                    )
+                )
+                count += 1
+            f.write(b"\n]" if count else b"]")
+
+        os.replace(temp_path, file_path)
+        print(f"✓ Saved {count} records for collection \"{collection['name']}\"")
+        return count
+    except requests.RequestException:
+        # Fetch failures from the record stream are reported by get_records
+        raise
+    except OSError as error:
         print(f"Error saving records for collection {collection['name']}:", error)
+        return None
+    finally:
+        temp_path.unlink(missing_ok=True)
 
 
 def fetch_all_data() -> None:
@@ -261,14 +442,18 @@ def fetch_all_data() -> None:
 
     print(f"✓ Found {len(collections)} collections")
 
-    # Process each collection
+    # Process each collection, reusing the ETags from the previous run
+    etag_cache = load_etag_cache()
+
     for collection in collections:
         print(f"Processing collection: {collection['name']} ({collection['id']})")
-        records = get_records(collection)
+        record_count = get_records(collection, etag_cache)
         print(
-            f"✓ Processed {len(records)} records for collection \"{collection['name']}\""
+            f"✓ Processed {record_count} records for collection \"{collection['name']}\""
         )
 
+    save_etag_cache(etag_cache)
+
     print("✓ All data fetched successfully")
 
 
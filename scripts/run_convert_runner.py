@@ -48,10 +48,9 @@ print("This will create/update files in the content/blog directory...")
 # Run the conversion script
 try:
     # Import and run the conversion module
-    import asyncio
     from scripts.convert_content import main
 
-    asyncio.run(main())
+    main()
 
     # Count the number of markdown files created
     blog_dir = Path("./content/blog")
@@ -1,7 +1,8 @@
 """
 Types for the content conversion system
 """
-from typing import Any, Callable, Dict, List, Optional, Protocol, TypedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Protocol, Tuple, TypedDict
 
 
 # Base content item type
@@ -44,6 +45,11 @@ class FrontmatterFieldConfig(TypedDict, total=False):
     required: Optional[bool]
 
 
+# Frontmatter field configuration resolved once per converter run:
+# (sourceField, targetField, formatter, required)
+CompiledFrontmatterField = Tuple[str, str, Optional[FormatterProtocol], bool]
+
+
 # Extractor configuration
 class ExtractorConfig(TypedDict):
     field: str
@@ -90,3 +96,15 @@ class LatestItemsExporterConfig(TypedDict):
     # Output TypeScript configuration
     interfaceName: str
     exportName: str
+
+
+# Content converter configuration resolved once per run, with the fields the
+# per-item conversion reads held in slots rather than dictionary keys
+@dataclass(frozen=True, slots=True)
+class CompiledConverterConfig:
+    target_dir: str
+    slug_field: str
+    content_field: str
+    output_format: str
+    frontmatter_fields: Tuple[CompiledFrontmatterField, ...]
+    extractors: Tuple[ExtractorConfig, ...]
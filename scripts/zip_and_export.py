@@ -1,17 +1,40 @@
 """
 Script to zip and export static output to Kantan CMS
 """
+import functools
+import hashlib
+import mmap
 import os
+import struct
 import sys
-import zipfile
-from pathlib import Path
-from typing import Dict, Literal, TypedDict, Union
+import tempfile
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    BinaryIO,
+    Deque,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+    TypedDict,
+    Union,
+)
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-# Load environment variables
-load_dotenv(dotenv_path=".env.local")
+try:
+    import deflate
+except ImportError:  # libdeflate bindings are optional, fall back to zlib
+    deflate = None
 
 
 # Configuration
@@ -20,16 +43,33 @@ class KantanConfig(TypedDict):
     api_key: str
     base_url: str
     static_output_dir: str
-    zip_filename: str
+    zip_compress_level: int
+    zip_preview_compress_level: int
 
 
-config: KantanConfig = {
-    "project_id": os.environ.get("PROJECT_ID", ""),
-    "api_key": os.environ.get("CMS_API_KEY", ""),
-    "base_url": os.environ.get("CMS_BASE_URL", ""),
-    "static_output_dir": os.environ.get("STATIC_OUTPUT_DIR", "./out"),
-    "zip_filename": os.environ.get("ZIP_FILENAME", "site-export.zip"),
-}
+@functools.lru_cache(maxsize=1)
+def get_config() -> KantanConfig:
+    """
+    Loads the deployment configuration on first use
+    """
+    # Load environment variables
+    load_dotenv(dotenv_path=".env.local")
+
+    return {
+        "project_id": os.environ.get("PROJECT_ID", ""),
+        "api_key": os.environ.get("CMS_API_KEY", ""),
+        "base_url": os.environ.get("CMS_BASE_URL", ""),
+        "static_output_dir": os.environ.get("STATIC_OUTPUT_DIR", "./out"),
+        "zip_compress_level": int(os.environ.get("ZIP_COMPRESS_LEVEL", "6")),
+        # Preview deployments favour a fast build over a smaller archive
+        "zip_preview_compress_level": int(
+            os.environ.get("ZIP_PREVIEW_COMPRESS_LEVEL", "1")
+        ),
+    }
+
+
+# Archives up to this size are built in memory, larger ones spill to disk
+ZIP_SPOOL_MAX_SIZE = 256 << 20
 
 
 # API response types
@@ -57,20 +97,527 @@ class UpdateHostingStatusReq(TypedDict):
     hosting: HostingStatus
 
 
-# Create a session with authentication headers
-session = requests.Session()
-session.headers.update(
+# ZIP archive records (little-endian, see the PKWARE APPNOTE)
+LOCAL_FILE_HEADER = struct.Struct("<4s5H3L2H")
+CENTRAL_DIRECTORY_HEADER = struct.Struct("<4s6H3L5H2L")
+END_OF_CENTRAL_DIRECTORY = struct.Struct("<4s4H2LH")
+ZIP64_END_OF_CENTRAL_DIRECTORY = struct.Struct("<4sQ2H2L4Q")
+ZIP64_END_OF_CENTRAL_DIRECTORY_LOCATOR = struct.Struct("<4sLQL")
+# Header of the extra field holding the 64-bit values of an entry
+ZIP64_EXTRA_HEADER = struct.Struct("<2H")
+ZIP64_EXTRA_ID = 0x0001
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP_VERSION = 20  # 2.0, the version that introduced DEFLATE
+ZIP64_VERSION = 45  # 4.5, the version that introduced ZIP64
+ZIP_UTF8_FLAG = 0x800
+# Sizes, offsets and counts past these limits are recorded in ZIP64 fields.
+# Like zipfile, sizes switch over at 2 GiB for readers using signed offsets.
+ZIP64_LIMIT = (1 << 31) - 1
+ZIP_FILECOUNT_LIMIT = (1 << 16) - 1
+# Placeholders written in the fixed-size fields when ZIP64 values are used
+ZIP64_SIZE_MARKER = 0xFFFFFFFF
+ZIP64_COUNT_MARKER = 0xFFFF
+# Entries record Unix permissions, as zipfile does on every platform but Windows
+ZIP_CREATE_SYSTEM = 0 if os.name == "nt" else 3
+
+# Already-compressed formats are stored as-is, DEFLATE only costs CPU on these
+INCOMPRESSIBLE_EXTENSIONS = frozenset(
     {
-        "X-Project-Id": config["project_id"],
-        "X-API-Key": config["api_key"],
-        "Content-Type": "application/json",
+        ".png",
+        ".jpg",
+        ".jpeg",
+        ".webp",
+        ".avif",
+        ".gif",
+        ".woff",
+        ".woff2",
+        ".mp3",
+        ".mp4",
+        ".webm",
+        ".gz",
+        ".br",
+        ".zip",
     }
 )
 
+# Compression threads, matching ThreadPoolExecutor's default
+ZIP_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+# Maximum number of compressed files waiting to be written at any time
+MAX_PENDING_ENTRIES = 2 * ZIP_WORKERS
+
+# Files larger than this are memory-mapped instead of read into a bytes object
+MMAP_THRESHOLD = 1 << 20
+
+# File contents as read from disk or the cache, or mapped into memory
+FileData = Union[bytes, mmap.mmap, memoryview]
+
+# Compressed entries from previous builds, keyed by a digest of the file
+# contents, with one directory per compression level so preview and production
+# builds don't purge each other's entries
+ZIP_CACHE_DIR = os.path.join(".cache", "zip")
+# Cached entries start with the method, CRC-32 and uncompressed size of the file
+ZIP_CACHE_HEADER = struct.Struct("<HLQ")
+
+
+# A file stored in the archive, as recorded in the central directory
+class ZipEntry(TypedDict):
+    name: bytes
+    flags: int
+    method: int
+    dos_time: int
+    dos_date: int
+    crc: int
+    compressed_size: int
+    file_size: int
+    external_attr: int
+    offset: int
+
+
+@functools.lru_cache(maxsize=1)
+def get_session() -> requests.Session:
+    """
+    Creates the session used for CMS API calls on first use
+    """
+    config = get_config()
+
+    # Create a session with authentication headers
+    session = requests.Session()
+    session.headers.update(
+        {
+            "X-Project-Id": config["project_id"],
+            "X-API-Key": config["api_key"],
+            "Content-Type": "application/json",
+        }
+    )
+    return session
+
+
+@functools.lru_cache(maxsize=1)
+def get_upload_session() -> requests.Session:
+    """
+    Creates the session used for presigned uploads on first use
+
+    Uploads get their own session: the URL carries its own signature and must
+    not be sent the CMS authentication headers.
+    """
+    upload_session = requests.Session()
+    upload_adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=4,
+        max_retries=Retry(
+            total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]
+        ),
+    )
+    upload_session.mount("https://", upload_adapter)
+    upload_session.mount("http://", upload_adapter)
+    return upload_session
+
+
+def compress_data(data: FileData, compresslevel: int) -> bytes:
+    """
+    Compresses data into a raw DEFLATE stream, using libdeflate when available
+    """
+    if deflate is not None:
+        return bytes(deflate.deflate_compress(data, compresslevel))
+
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def checksum_data(data: FileData) -> int:
+    """
+    Computes the CRC-32 of data, using libdeflate's folded CRC when available
+    """
+    if deflate is not None:
+        return deflate.crc32(data)
+
+    return zlib.crc32(data)
+
+
+def to_dos_datetime(timestamp: float) -> Tuple[int, int]:
+    """
+    Converts a timestamp to the (time, date) pair used in ZIP headers
+    """
+    year, month, day, hour, minute, second = time.localtime(timestamp)[:6]
+    # DOS dates can only represent 1980 through 2107
+    if year < 1980:
+        year, month, day, hour, minute, second = 1980, 1, 1, 0, 0, 0
+    elif year > 2107:
+        year, month, day, hour, minute, second = 2107, 12, 31, 23, 59, 58
+
+    dos_time = (hour << 11) | (minute << 5) | (second // 2)
+    dos_date = ((year - 1980) << 9) | (month << 5) | day
+    return dos_time, dos_date
+
+
+def iter_source_files(directory: str, prefix: str = "") -> Iterator[Tuple[str, str]]:
+    """
+    Yields the path and archive name of every file under directory
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            # Like os.walk, symlinked files are archived but not symlinked dirs
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_source_files(entry.path, f"{prefix}{entry.name}/")
+            elif entry.is_file():
+                yield entry.path, prefix + entry.name
+
+
+def read_file_data(file_path: str) -> FileData:
+    """
+    Reads a whole file, memory-mapping it when it is large
+    """
+    # Files are read whole, so skip the buffered layer and read straight into
+    # a bytes object sized from fstat
+    with open(file_path, "rb", buffering=0) as f:
+        # Large files are mapped so CRC32 and DEFLATE read the page cache directly
+        if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+
+
+def zip_cache_dir(compresslevel: int) -> str:
+    """
+    Returns the cache directory for entries compressed at compresslevel
+    """
+    return os.path.join(ZIP_CACHE_DIR, str(compresslevel))
+
+
+def zip_cache_key(data: FileData) -> str:
+    """
+    Computes the cache key of a file's compressed entry from its contents
+    """
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def load_cached_entry(cache_path: str) -> Optional[Tuple[int, int, int, FileData]]:
+    """
+    Loads the method, CRC-32, size and compressed data of a cached entry
+    """
+    try:
+        with open(cache_path, "rb", buffering=0) as f:
+            cached = f.read()
+        method, crc, file_size = ZIP_CACHE_HEADER.unpack_from(cached)
+    except (OSError, struct.error):
+        return None
+
+    return method, crc, file_size, memoryview(cached)[ZIP_CACHE_HEADER.size :]
+
+
+def save_cached_entry(
+    cache_path: str, method: int, crc: int, file_size: int, compressed: FileData
+) -> None:
+    """
+    Saves a compressed entry so an unchanged file isn't compressed again
+    """
+    try:
+        # Files with identical contents share a key, so each writer needs its
+        # own temporary file
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(cache_path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(ZIP_CACHE_HEADER.pack(method, crc, file_size))
+            f.write(compressed)
+        os.replace(temp_path, cache_path)
+    except OSError as error:
+        print("Error caching ZIP entry:", error)
+
+
+def purge_zip_cache(cache_dir: str, cache_keys: Set[str]) -> None:
+    """
+    Removes cached entries that were not used by the last archive
+    """
+    with os.scandir(cache_dir) as entries:
+        for entry in entries:
+            if entry.name not in cache_keys:
+                os.remove(entry.path)
+
+
+def build_zip_entry(
+    file_path: str, arcname: str, compresslevel: int, cache_keys: Set[str]
+) -> Tuple[ZipEntry, FileData]:
+    """
+    Reads and compresses a file, returning its archive entry and compressed data
+
+    Already-compressed assets, and files DEFLATE can't shrink, are stored as-is.
+    Compressed data, or the decision to store a file, is reused from the cache
+    for files whose contents were archived before, and the cache key is added
+    to cache_keys.
+    """
+    stat = os.stat(file_path)
+
+    try:
+        name, flags = arcname.encode("ascii"), 0
+    except UnicodeEncodeError:
+        name, flags = arcname.encode("utf-8"), ZIP_UTF8_FLAG
+
+    data = read_file_data(file_path)
+    method = ZIP_STORED
+    compressed: FileData = data
+
+    if os.path.splitext(arcname)[1].lower() in INCOMPRESSIBLE_EXTENSIONS:
+        crc, file_size = checksum_data(data), len(data)
+    else:
+        # Keyed on the contents, so rebuilt files with fresh mtimes still hit
+        cache_key = zip_cache_key(data)
+        cache_keys.add(cache_key)
+        cache_path = os.path.join(zip_cache_dir(compresslevel), cache_key)
+        cached = load_cached_entry(cache_path)
+
+        if cached is not None:
+            method, crc, file_size, deflated = cached
+            # Entries DEFLATE couldn't shrink are cached without their data
+            if method == ZIP_DEFLATED:
+                compressed = deflated
+        else:
+            crc, file_size = checksum_data(data), len(data)
+            deflated = compress_data(data, compresslevel)
+            # Store entries that DEFLATE would only make larger
+            if len(deflated) < file_size:
+                method, compressed = ZIP_DEFLATED, deflated
+                save_cached_entry(cache_path, method, crc, file_size, deflated)
+            else:
+                save_cached_entry(cache_path, method, crc, file_size, b"")
+
+    dos_time, dos_date = to_dos_datetime(stat.st_mtime)
+
+    entry: ZipEntry = {
+        "name": name,
+        "flags": flags,
+        "method": method,
+        "dos_time": dos_time,
+        "dos_date": dos_date,
+        "crc": crc,
+        "compressed_size": len(compressed),
+        "file_size": file_size,
+        "external_attr": (stat.st_mode & 0xFFFF) << 16,
+        "offset": 0,
+    }
+    return entry, compressed
+
+
+def pack_zip64_extra(values: List[int]) -> bytes:
+    """
+    Packs the ZIP64 extra field holding the 64-bit sizes and offset of an entry
+    """
+    if not values:
+        return b""
+
+    return ZIP64_EXTRA_HEADER.pack(ZIP64_EXTRA_ID, 8 * len(values)) + struct.pack(
+        f"<{len(values)}Q", *values
+    )
+
+
+def pack_local_file_header(entry: ZipEntry) -> bytes:
+    """
+    Packs the local file header written in front of an entry's data
+    """
+    version = ZIP_VERSION
+    file_size = entry["file_size"]
+    compressed_size = entry["compressed_size"]
+    extra = b""
+    # Local headers move both sizes to the ZIP64 field once either needs it
+    if file_size > ZIP64_LIMIT or compressed_size > ZIP64_LIMIT:
+        version = ZIP64_VERSION
+        extra = pack_zip64_extra([file_size, compressed_size])
+        file_size = compressed_size = ZIP64_SIZE_MARKER
+
+    return (
+        LOCAL_FILE_HEADER.pack(
+            b"PK\x03\x04",
+            version,
+            entry["flags"],
+            entry["method"],
+            entry["dos_time"],
+            entry["dos_date"],
+            entry["crc"],
+            compressed_size,
+            file_size,
+            len(entry["name"]),
+            len(extra),
+        )
+        + entry["name"]
+        + extra
+    )
+
+
+def pack_central_directory(entries: List[ZipEntry], offset: int) -> bytes:
+    """
+    Packs the central directory and end of central directory records for
+    entries, with the directory starting at offset
+    """
+    records = []
+    for entry in entries:
+        file_size = entry["file_size"]
+        compressed_size = entry["compressed_size"]
+        entry_offset = entry["offset"]
+
+        # Values that don't fit go to the ZIP64 field, in this order
+        zip64_values = []
+        if file_size > ZIP64_LIMIT:
+            zip64_values.append(file_size)
+            file_size = ZIP64_SIZE_MARKER
+        if compressed_size > ZIP64_LIMIT:
+            zip64_values.append(compressed_size)
+            compressed_size = ZIP64_SIZE_MARKER
+        if entry_offset > ZIP64_LIMIT:
+            zip64_values.append(entry_offset)
+            entry_offset = ZIP64_SIZE_MARKER
+
+        extra = pack_zip64_extra(zip64_values)
+        version = ZIP64_VERSION if extra else ZIP_VERSION
+        records.append(
+            CENTRAL_DIRECTORY_HEADER.pack(
+                b"PK\x01\x02",
+                (ZIP_CREATE_SYSTEM << 8) | version,
+                version,
+                entry["flags"],
+                entry["method"],
+                entry["dos_time"],
+                entry["dos_date"],
+                entry["crc"],
+                compressed_size,
+                file_size,
+                len(entry["name"]),
+                len(extra),
+                0,
+                0,
+                0,
+                entry["external_attr"],
+                entry_offset,
+            )
+        )
+        records.append(entry["name"])
+        records.append(extra)
+
+    central_directory = b"".join(records)
+    count = len(entries)
+    directory_size = len(central_directory)
+
+    zip64_records = b""
+    if (
+        count > ZIP_FILECOUNT_LIMIT
+        or directory_size > ZIP64_LIMIT
+        or offset > ZIP64_LIMIT
+    ):
+        zip64_records = ZIP64_END_OF_CENTRAL_DIRECTORY.pack(
+            b"PK\x06\x06",
+            # The record size excludes the signature and the size field itself
+            ZIP64_END_OF_CENTRAL_DIRECTORY.size - 12,
+            (ZIP_CREATE_SYSTEM << 8) | ZIP64_VERSION,
+            ZIP64_VERSION,
+            0,
+            0,
+            count,
+            count,
+            directory_size,
+            offset,
+        ) + ZIP64_END_OF_CENTRAL_DIRECTORY_LOCATOR.pack(
+            b"PK\x06\x07", 0, offset + directory_size, 1
+        )
+        count = min(count, ZIP64_COUNT_MARKER)
+        directory_size = min(directory_size, ZIP64_SIZE_MARKER)
+        offset = min(offset, ZIP64_SIZE_MARKER)
+
+    return (
+        central_directory
+        + zip64_records
+        + END_OF_CENTRAL_DIRECTORY.pack(
+            b"PK\x05\x06",
+            0,
+            0,
+            count,
+            count,
+            directory_size,
+            offset,
+            0,
+        )
+    )
+
+
+class SpooledArchive(tempfile.SpooledTemporaryFile):
+    """
+    A spooled temporary file that reports its size, so requests can set the
+    upload's Content-Length without calling fileno(), which would roll an
+    in-memory archive over to disk
+    """
+
+    def __len__(self) -> int:
+        position = self.tell()
+        size = self.seek(0, os.SEEK_END)
+        self.seek(position)
+        return size
+
 
-def create_zip_archive(output_path: str, source_dir: str) -> str:
+def write_zip_archive(
+    out: BinaryIO,
+    source_dir: str,
+    compresslevel: int,
+    cancel: Optional[threading.Event] = None,
+) -> int:
     """
-    Creates a ZIP archive of the static output directory
+    Writes a ZIP archive of every file under source_dir to out, returning the
+    archive size
+
+    Files are compressed in parallel on a thread pool (both zlib and libdeflate
+    release the GIL), then written in order with precomputed headers. At most
+    MAX_PENDING_ENTRIES files are held in memory ahead of the writer. Setting
+    cancel stops the build and discards any files not yet compressed.
+    """
+    entries: List[ZipEntry] = []
+    cache_keys: Set[str] = set()
+    offset = 0
+    cache_dir = zip_cache_dir(compresslevel)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=ZIP_WORKERS) as executor:
+        pending_entries: Deque["Future[Tuple[ZipEntry, FileData]]"] = deque()
+
+        def write_entry() -> None:
+            nonlocal offset
+            entry, compressed = pending_entries.popleft().result()
+            if cancel is not None and cancel.is_set():
+                executor.shutdown(cancel_futures=True)
+                raise Exception("ZIP archive creation was cancelled")
+
+            entry["offset"] = offset
+            header = pack_local_file_header(entry)
+            out.write(header)
+            out.write(compressed)
+            offset += len(header) + len(compressed)
+            entries.append(entry)
+
+        for file_path, arcname in iter_source_files(source_dir):
+            pending_entries.append(
+                executor.submit(
+                    build_zip_entry, file_path, arcname, compresslevel, cache_keys
+                )
+            )
+
+            if len(pending_entries) >= MAX_PENDING_ENTRIES:
+                write_entry()
+
+        while pending_entries:
+            write_entry()
+
+    purge_zip_cache(cache_dir, cache_keys)
+
+    end_records = pack_central_directory(entries, offset)
+    out.write(end_records)
+    return offset + len(end_records)
+
+
+def create_zip_archive(
+    source_dir: str,
+    compresslevel: int = 6,
+    cancel: Optional[threading.Event] = None,
+) -> BinaryIO:
+    """
+    Creates a ZIP archive of the static output directory, ready to be uploaded
+
+    The archive is kept in memory unless it outgrows ZIP_SPOOL_MAX_SIZE, and
+    any file it spills to is deleted once the archive is closed.
     """
     print(f"Creating ZIP archive of {source_dir}...")
 
@@ -78,25 +625,17 @@ def create_zip_archive(output_path: str, source_dir: str) -> str:
     if not os.path.exists(source_dir):
         raise FileNotFoundError(f"Source directory {source_dir} does not exist")
 
-    # Create the ZIP file
-    with zipfile.ZipFile(
-        output_path, "w", zipfile.ZIP_DEFLATED, compresslevel=9
-    ) as zipf:
-        source_path = Path(source_dir)
-
-        # Walk through the directory and add all files
-        for root, _, files in os.walk(source_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                # Calculate the relative path for the archive
-                rel_path = os.path.relpath(file_path, source_dir)
-                zipf.write(file_path, rel_path)
+    archive = SpooledArchive(max_size=ZIP_SPOOL_MAX_SIZE, suffix=".zip")
+    try:
+        zip_size = write_zip_archive(archive, source_dir, compresslevel, cancel)
+    except BaseException:
+        archive.close()
+        raise
+    archive.seek(0)
 
-    # Get the size of the created ZIP file
-    zip_size = os.path.getsize(output_path)
-    print(f"✓ Archive created: {output_path} ({zip_size} bytes)")
+    print(f"✓ Archive created ({zip_size} bytes)")
 
-    return output_path
+    return archive
 
 
 def get_presigned_url() -> str:
@@ -104,8 +643,8 @@ def get_presigned_url() -> str:
     Requests a presigned URL for uploading the ZIP archive
     """
     try:
-        response = session.post(
-            f"{config['base_url']}/v1/api/hosting/build/upload_presigned_url/"
+        response = get_session().post(
+            f"{get_config()['base_url']}/v1/api/hosting/build/upload_presigned_url/"
         )
         response.raise_for_status()
         data = response.json()
@@ -115,25 +654,19 @@ def get_presigned_url() -> str:
         raise Exception("Failed to get presigned URL for upload")
 
 
-def upload_zip_to_presigned_url(zip_path: str, presigned_url: str) -> bool:
+def upload_zip_to_presigned_url(archive: BinaryIO, presigned_url: str) -> bool:
     """
     Uploads the ZIP archive to the presigned URL
     """
     try:
-        with open(zip_path, "rb") as file:
-            file_size = os.path.getsize(zip_path)
-
-            response = requests.put(
-                presigned_url,
-                data=file,
-                headers={
-                    "Content-Type": "application/zip",
-                    "Content-Length": str(file_size),
-                },
-            )
+        # requests sizes the body from the archive for Content-Length
+        archive.seek(0)
+        response = get_upload_session().put(
+            presigned_url, data=archive, headers={"Content-Type": "application/zip"}
+        )
 
-            response.raise_for_status()
-            return response.status_code == 200
+        response.raise_for_status()
+        return response.ok
     except requests.RequestException as error:
         print("Error uploading ZIP file:", error)
         raise Exception("Failed to upload ZIP file")
@@ -150,11 +683,11 @@ def update_hosting_status(
             "hosting": {"status": status, "status_message": message}
         }
 
-        response = session.post(
-            f"{config['base_url']}/v1/api/hosting/status/", json=request_body
+        response = get_session().post(
+            f"{get_config()['base_url']}/v1/api/hosting/status/", json=request_body
         )
         response.raise_for_status()
-        return response.status_code == 200
+        return response.ok
     except requests.RequestException as error:
         print("Error updating hosting status:", error)
         raise Exception("Failed to update hosting status")
@@ -166,20 +699,43 @@ def deploy_to_kantan(is_preview: bool = False) -> None:
     """
     try:
         print("Starting deployment to Kantan CMS...")
+        config = get_config()
 
-        # 1. Create ZIP archive of the static output
-        zip_path = os.path.abspath(config["zip_filename"])
-        create_zip_archive(zip_path, config["static_output_dir"])
-
-        # 2. Get presigned URL for upload
-        print("Requesting presigned upload URL...")
-        presigned_url = get_presigned_url()
+        compresslevel = (
+            config["zip_preview_compress_level"]
+            if is_preview
+            else config["zip_compress_level"]
+        )
+        presign_failed = threading.Event()
+
+        def cancel_on_failure(future: Future) -> None:
+            if future.exception() is not None:
+                presign_failed.set()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # 1. Request the presigned URL while the archive is being built
+            print("Requesting presigned upload URL...")
+            presign_future = executor.submit(get_presigned_url)
+            presign_future.add_done_callback(cancel_on_failure)
+
+            # 2. Create ZIP archive of the static output
+            try:
+                archive = create_zip_archive(
+                    config["static_output_dir"], compresslevel, presign_failed
+                )
+            except Exception:
+                # A failed presign request cancels the build, report its error
+                if presign_failed.is_set():
+                    presign_future.result()
+                raise
+            presigned_url = presign_future.result()
         print("✓ Received presigned URL")
         print("presignedUrl", presigned_url)
 
         # 3. Upload the ZIP file
         print("Uploading ZIP archive...")
-        upload_success = upload_zip_to_presigned_url(zip_path, presigned_url)
+        upload_success = upload_zip_to_presigned_url(archive, presigned_url)
+        archive.close()
         print("uploadSuccess", upload_success)
         print("✓ Upload completed successfully")
 
@@ -195,10 +751,6 @@ def deploy_to_kantan(is_preview: bool = False) -> None:
         status_update_success = update_hosting_status(status_type, status_message)
         print("✓ Status updated successfully")
 
-        # 5. Clean up the ZIP file
-        os.remove(zip_path)
-        print("✓ Cleaned up temporary ZIP file")
-
         print("✓ Deployment to Kantan CMS completed successfully")
         print(
             f"{'Preview' if is_preview else 'Production'} site will be available shortly"